@@ -4,6 +4,7 @@ import time
 import os
 import json
 import re
+import itertools
 
 # ========================================
 # SENSOR MAPPING CONFIGURATION
@@ -19,65 +20,33 @@ BAUD_RATE = 115200
 SAMPLES_PER_WEIGHT = 10
 KG_TO_NEWTONS = 9.80665
 
+# Pattern: Keyword(optional_label): value unit
+# Matches: "Current(M1): 0.013" or "Z-axis: 12.693"
+# Never spans a newline, so it can also be run over multi-line chunks.
+SENSOR_VALUE_REGEX = r"\(?([^)\n]*)\)?:[ \t]*([-+]?\d+\.?\d*)"
+# Compiled patterns keyed by keyword, filled by get_sensor_pattern().
+SENSOR_PATTERNS = {}
+
 # ========================================
 # HELPER FUNCTIONS
 # ========================================
 
-def extract_sensor_value(line, keyword):
+def get_sensor_pattern(keyword):
     """
-    Extract sensor value from serial output.
+    Return the compiled pattern for a keyword, compiling it on first use.
     
     Handles formats like:
     - "Current(M1): 0.013 A"
     - "Z-axis(M1): 12.693 mT"
     - "Current: 0.013 A"
     
-    Returns: (value, sensor_label) or (None, None) if not found
+    Group 1 is the optional sensor label, group 2 the numeric value.
     """
-    if keyword not in line:
-        return None, None
-    
-    try:
-        # Pattern: Keyword(optional_label): value unit
-        # Matches: "Current(M1): 0.013" or "Z-axis: 12.693"
-        pattern = rf"{keyword}\(?([^)]*)\)?:\s*([-+]?\d+\.?\d*)"
-        match = re.search(pattern, line)
-        
-        if match:
-            sensor_label = match.group(1) if match.group(1) else keyword
-            value = float(match.group(2))
-            return value, sensor_label
-        
-        return None, None
-    except (ValueError, IndexError):
-        return None, None
-
-
-def read_sensor_value(ser, keyword, description):
-    """
-    Read a single sensor value from serial.
-    
-    Args:
-        ser: Serial connection
-        keyword: Keyword to search for (e.g., "Current", "Z-axis")
-        description: Human-readable description (e.g., "Current", "Z-axis")
-    
-    Returns: (value, sensor_label) or (None, None)
-    """
-    if keyword is None:
-        return None, None
-    
-    while True:
-        try:
-            line = ser.readline().decode('utf-8').strip()
-            if not line:
-                continue
-            
-            value, label = extract_sensor_value(line, keyword)
-            if value is not None:
-                return value, label
-        except (ValueError, UnicodeDecodeError, AttributeError):
-            continue
+    pattern = SENSOR_PATTERNS.get(keyword)
+    if pattern is None:
+        pattern = SENSOR_PATTERNS[keyword] = re.compile(
+            re.escape(keyword) + SENSOR_VALUE_REGEX)
+    return pattern
 
 
 def collect_samples(ser, keyword, description, num_samples):
@@ -95,29 +64,40 @@ def collect_samples(ser, keyword, description, num_samples):
     if keyword is None:
         return None, None
     
+    if num_samples <= 0:
+        print(f"  ✗ No {description} samples collected!")
+        return None, None
+    
     ser.reset_input_buffer()
     time.sleep(0.2)
     
     print(f"\n  Collecting {num_samples} {description} samples...")
-    samples = []
+    pattern = get_sensor_pattern(keyword)
+    samples = np.empty(num_samples, dtype=np.float64)
+    n_valid = 0
     sensor_label = None
+    pending = ''
     
-    for i in range(num_samples):
-        value, label = read_sensor_value(ser, keyword, description)
-        if value is not None:
-            samples.append(value)
-            sensor_label = label
-            print(f"    Sample {i+1}: {description} = {value:.3f}")
-            time.sleep(0.1)
-        else:
-            print(f"    Sample {i+1}: {description} = (skipped - no data)")
-    
-    if not samples:
-        print(f"  ✗ No {description} samples collected!")
-        return None, None
+    while n_valid < num_samples:
+        # Drain whatever has arrived and parse all complete lines in one pass
+        pending += ser.read(ser.in_waiting or 1).decode('utf-8', errors='replace')
+        chunk, _, pending = pending.rpartition('\n')
+        matches = list(itertools.islice(pattern.finditer(chunk),
+                                        num_samples - n_valid))
+        if not matches:
+            continue
+        
+        count = len(matches)
+        values = np.fromiter(
+            (float(m.group(2)) for m in matches), dtype=np.float64, count=count)
+        samples[n_valid:n_valid + count] = values
+        for i, value in enumerate(values, start=n_valid + 1):
+            print(f"    Sample {i}: {description} = {value:.3f}")
+        n_valid += count
+        sensor_label = matches[-1].group(1) or keyword
     
-    avg = np.mean(samples)
-    std = np.std(samples)
+    avg = samples.mean()
+    std = samples.std()
     print(f"\n  Average {description}: {avg:.3f} ± {std:.3f}")
     return avg, sensor_label
 
@@ -203,36 +183,51 @@ def main():
     # Z-AXIS SENSOR CALIBRATION
     # ========================================
     z_axis_calib = None
-    if any(x is not None for x in z_axis_readings):
-        z_axis_readings_clean = np.array([x for x in z_axis_readings if x is not None])
+    # Pair each valid Z-axis reading with the force applied at that point
+    valid = [i for i, z in enumerate(z_axis_readings) if z is not None]
+    if valid:
+        z_axis_readings_clean = np.array([z_axis_readings[i] for i in valid])
         
         if len(z_axis_readings_clean) >= 2:
             # Linear fit: Force = slope * Z_axis + intercept
-            slope_z, intercept_z = np.polyfit(z_axis_readings_clean,
-                                              forces_newtons[:len(z_axis_readings_clean)], 1)
-            
-            predicted = slope_z * z_axis_readings_clean + intercept_z
-            residuals = forces_newtons[:len(z_axis_readings_clean)] - predicted
-            ss_res = np.sum(residuals**2)
-            ss_tot = np.sum((forces_newtons[:len(z_axis_readings_clean)] - 
-                           np.mean(forces_newtons[:len(z_axis_readings_clean)]))**2)
-            r_squared_z = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-            
-            z_axis_calib = {
-                "slope": float(slope_z),
-                "intercept": float(intercept_z),
-                "r_squared": float(r_squared_z),
-                "formula": "Force (N) = slope * Z-axis (mT) + intercept",
-                "sensor_label": z_axis_labels[0] if z_axis_labels[0] else Z_AXIS_KEYWORD
-            }
+            # Closed-form least squares from centered moment sums (no SVD
+            # needed for a degree-1 fit on a handful of points). Centering
+            # avoids cancellation when readings are large relative to their spread.
+            x = z_axis_readings_clean
+            y = forces_newtons[valid]
+            x_mean, y_mean = x.mean(), y.mean()
+            dx = x - x_mean
+            dy = y - y_mean
+            sxx_c = dx @ dx
+            sxy_c = dx @ dy
+            syy_c = dy @ dy
             
-            print("\n" + "=" * 70)
-            print("Z-AXIS SENSOR CALIBRATION RESULTS")
-            print("=" * 70)
-            print(f"Formula: Force (N) = {slope_z:.6f} * Z-axis (mT) + {intercept_z:.6f}")
-            print(f"Slope:     {slope_z:.6f}")
-            print(f"Intercept: {intercept_z:.6f}")
-            print(f"R² value:  {r_squared_z:.6f}")
+            if sxx_c <= np.finfo(np.float64).eps * (x @ x):
+                print("\n✗ Error: All Z-axis readings are identical, cannot fit a line.")
+            else:
+                slope_z = sxy_c / sxx_c
+                intercept_z = y_mean - slope_z * x_mean
+                
+                # R² from the same centered sums, no residual array needed
+                ss_res = max(syy_c - slope_z * sxy_c, 0.0)
+                ss_tot = syy_c
+                r_squared_z = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+                
+                z_axis_calib = {
+                    "slope": float(slope_z),
+                    "intercept": float(intercept_z),
+                    "r_squared": float(r_squared_z),
+                    "formula": "Force (N) = slope * Z-axis (mT) + intercept",
+                    "sensor_label": z_axis_labels[0] if z_axis_labels[0] else Z_AXIS_KEYWORD
+                }
+                
+                print("\n" + "=" * 70)
+                print("Z-AXIS SENSOR CALIBRATION RESULTS")
+                print("=" * 70)
+                print(f"Formula: Force (N) = {slope_z:.6f} * Z-axis (mT) + {intercept_z:.6f}")
+                print(f"Slope:     {slope_z:.6f}")
+                print(f"Intercept: {intercept_z:.6f}")
+                print(f"R² value:  {r_squared_z:.6f}")
     
     # ========================================
     # SAVE CALIBRATION DATA TO JSON
@@ -263,10 +258,9 @@ def main():
     print(f"{'Weight (kg)':<15} {'Force (N)':<15} {'Z-axis (mT)':<15}")
     print("-" * 70)
     
-    for i in range(len(weights_kg)):
-        z_val = z_axis_readings[i] if i < len(z_axis_readings) and z_axis_readings[i] is not None else None
+    for weight, force, z_val in zip(weights_kg, forces_newtons, z_axis_readings):
         z_str = f"{z_val:.3f}" if z_val is not None else "N/A"
-        print(f"{weights_kg[i]:<15.3f} {forces_newtons[i]:<15.3f} {z_str:<15}")
+        print(f"{weight:<15.3f} {force:<15.3f} {z_str:<15}")
     
     print("=" * 70)
 
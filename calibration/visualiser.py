@@ -8,6 +8,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import re
+from types import SimpleNamespace
 
 # ========================================
 # SENSOR MAPPING CONFIGURATION
@@ -19,39 +20,49 @@ Z_AXIS_KEYWORD = "Z-axis"        # Keyword for Z-axis sensor
 SERIAL_PORT = 'COM4'  # Change to your Pico's COM port
 BAUD_RATE = 115200
 
+# Unit conversion (same constant as calibration_pico.py)
+KG_TO_NEWTONS = 9.80665
+NEWTONS_TO_KG = 1.0 / KG_TO_NEWTONS
+
+# Plot configuration
+FRAME_INTERVAL_MS = 100        # Pico prints at 10 Hz; faster frames redraw stale values
+AUTOSCALE_EVERY_N_FRAMES = 5   # Rescaling forces a full redraw, so keep it rare
+
 # Get script directory for calibration file
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CALIBRATION_FILE = os.path.join(SCRIPT_DIR, 'calibration_data.json')
 
+# Pattern: Keyword(optional_label): value unit
+SENSOR_VALUE_REGEX = r"\(?([^)\n]*)\)?:[ \t]*([-+]?\d+\.?\d*)"
+
 # ========================================
 # HELPER FUNCTIONS
 # ========================================
 
-def extract_sensor_value(line, keyword):
+def make_extractor(keyword):
     """
-    Extract sensor value from serial output.
+    Build a sensor value extractor specialised for one keyword.
     
+    The pattern is compiled once and captured by the returned function.
     Handles formats like:
     - "Current(M1): 0.013 A"
     - "Z-axis(M1): 12.693 mT"
     
-    Returns: value or None
+    Returns: extract(line) -> value or None
     """
-    if keyword not in line:
-        return None
+    pattern = re.compile(re.escape(keyword) + SENSOR_VALUE_REGEX)
     
-    try:
-        # Pattern: Keyword(optional_label): value unit
-        pattern = rf"{keyword}\(?([^)]*)\)?:\s*([-+]?\d+\.?\d*)"
-        match = re.search(pattern, line)
-        
-        if match:
-            value = float(match.group(2))
-            return value
-        
-        return None
-    except (ValueError, IndexError):
-        return None
+    def extract(line):
+        match = pattern.search(line)
+        if match is None:
+            return None
+        return float(match.group(2))
+    
+    return extract
+
+
+# Specialised at import time for the configured Z-axis keyword
+extract_z_axis = make_extractor(Z_AXIS_KEYWORD)
 
 
 def load_calibration():
@@ -78,43 +89,48 @@ def load_calibration():
         return None
 
 
-def read_sensor_values(ser):
+def read_sensor_values(ser, state):
     """
-    Read Z-axis sensor value from serial.
+    Drain all pending serial data and return the most recent Z-axis value.
+    
+    Reading the whole backlog each frame keeps the OS buffer small, so the
+    displayed value lags the sensor by at most one frame.
+    
+    Args:
+        ser: Serial connection
+        state: Display state; state.carry holds the trailing partial line
     
     Returns: z_axis_value or None
     """
-    while True:
-        try:
-            line = ser.readline().decode('utf-8').strip()
-            if not line:
-                continue
-            
-            z_axis_val = extract_sensor_value(line, Z_AXIS_KEYWORD)
-            
-            # Return if we got valid data
-            if z_axis_val is not None:
-                return z_axis_val
-        
-        except (ValueError, UnicodeDecodeError, AttributeError):
-            continue
+    data = ser.read(ser.in_waiting or 1).decode('utf-8', errors='replace')
+    lines = (state.carry + data).split('\n')
+    state.carry = lines.pop()
+    
+    # Only the newest complete reading matters for display
+    for line in reversed(lines):
+        z_axis_val = extract_z_axis(line)
+        if z_axis_val is not None:
+            return z_axis_val
+    
+    return None
 
 
-def calculate_force(z_value, z_calib):
+def calculate_force(z_value, slope, intercept):
     """
     Convert Z-axis reading to force in Newtons (clamped to non-negative).
     
     Args:
         z_value: Z-axis sensor reading
-        z_calib: Calibration data dict with slope and intercept
+        slope: Calibration slope (N/mT)
+        intercept: Calibration intercept (N)
     
     Returns: Force in Newtons (>= 0)
     """
-    if z_value is None or z_calib is None:
+    if z_value is None:
         return None
     
-    force = (z_calib['slope'] * z_value) + z_calib['intercept']
-    return max(0, force)  # Clamp to zero if negative
+    force = (slope * z_value) + intercept
+    return max(0.0, force)  # Clamp to zero if negative
 
 
 def main():
@@ -154,10 +170,17 @@ def main():
     print("Starting real-time visualization...")
     print("Close the plot window to stop.\n")
     
+    # Hoist calibration constants out of the per-frame path
+    slope = float(z_axis_calib['slope'])
+    intercept = float(z_axis_calib['intercept'])
+    
     # Initialize data storage
-    force_values = [0]
-    z_axis_values = [0]
-    max_force = [1.0]  # For auto-scaling
+    state = SimpleNamespace(
+        z=0.0,       # Latest Z-axis reading (mT)
+        force=0.0,   # Latest force (N)
+        fmax=1.0,    # Force axis limit for auto-scaling
+        carry='',    # Partial serial line left over from the previous frame
+    )
     
     # Set up the plot
     fig = plt.figure(figsize=(12, 5))
@@ -194,45 +217,51 @@ def main():
     
     plt.tight_layout()
     
+    # Bar rectangles and labels are the only artists that change per frame
+    bar_z_rect = bar_z[0]
+    bar_force_rect = bar_force[0]
+    artists = (bar_z_rect, bar_force_rect, z_text, force_text)
+    
     def update_plot(frame):
         """Update plot with new sensor data."""
         try:
             # Read new Z-axis data
-            z_axis_val = read_sensor_values(ser)
+            z_axis_val = read_sensor_values(ser, state)
             
             # Update Z-axis and force
             if z_axis_val is not None:
-                z_axis_values[0] = z_axis_val
-                force_n = calculate_force(z_axis_val, z_axis_calib)
+                state.z = z_axis_val
+                force_n = calculate_force(z_axis_val, slope, intercept)
                 if force_n is not None:
-                    force_values[0] = force_n
+                    state.force = force_n
                     
                     # Update max force for auto-scaling
-                    if force_n > max_force[0]:
-                        max_force[0] = force_n * 1.1
-                        ax_force.set_xlim(0, max_force[0])
+                    if force_n > state.fmax:
+                        state.fmax = force_n * 1.1
+            
+            # Apply auto-scaling on a slow path: changing xlim invalidates
+            # the blit background, so redraw the whole figure once
+            if (frame % AUTOSCALE_EVERY_N_FRAMES == 0 and
+                    state.fmax != ax_force.get_xlim()[1]):
+                ax_force.set_xlim(0, state.fmax)
+                fig.canvas.draw()
             
             # Update Z-axis display
-            bar_z_list = [bar for bar in ax_z.patches]
-            if bar_z_list:
-                bar_z_list[0].set_width(z_axis_values[0])
-            z_text.set_text(f'{z_axis_values[0]:.3f} mT')
+            bar_z_rect.set_width(state.z)
+            z_text.set_text(f'{state.z:.3f} mT')
             
             # Update force display
-            bar_force_list = [bar for bar in ax_force.patches]
-            if bar_force_list:
-                bar_force_list[0].set_width(force_values[0])
-            force_kg = force_values[0] / 9.81
-            force_text.set_text(f'{force_values[0]:.3f} N\n{force_kg:.4f} kg')
-            
-            return bar_z_list + bar_force_list
+            bar_force_rect.set_width(state.force)
+            force_kg = state.force * NEWTONS_TO_KG
+            force_text.set_text(f'{state.force:.3f} N\n{force_kg:.4f} kg')
         
         except Exception as e:
             print(f"Error updating plot: {e}")
-            return []
+        
+        return artists
     
-    # Create animation
-    anim = FuncAnimation(fig, update_plot, interval=50, blit=False, 
+    # Create animation (blitting redraws only the changed artists)
+    anim = FuncAnimation(fig, update_plot, interval=FRAME_INTERVAL_MS, blit=True,
                         cache_frame_data=False)
     
     try: